@@ -1,8 +1,15 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from pymongo.errors import BulkWriteError, OperationFailure
 from loguru import logger
 from app.core.config import settings
-from typing import Optional
+from typing import Optional, List, Set, Tuple, Any
 import asyncio
+from datetime import timezone
+
+# Names of the user listing indexes, so queries can hint them
+USER_CREATED_INDEX = "user_created_idx"
+USER_STATUS_CREATED_INDEX = "user_status_created_idx"
 
 class MongoDB:
     """
@@ -12,12 +19,19 @@ class MongoDB:
     - Connection to MongoDB server
     - Database operations with retry logic
     - Index creation for performance optimization
+    - Write batching for notification inserts and updates
     - Connection health monitoring
     """
     
     # Class-level variables for database connection
     client: Optional[AsyncIOMotorClient] = None
     db = None
+    _healthy: bool = False  # Last known connection state, updated from driver heartbeats
+    _write_batch: List[Tuple[Any, asyncio.Future]] = []  # Buffer of pending writes and their waiters
+    _write_lock = asyncio.Lock()  # Lock for thread-safe batch operations
+    _write_event = asyncio.Event()  # Set when writes are waiting to be flushed
+    _write_task: Optional[asyncio.Task] = None  # Task for flushing writes
+    _flush_tasks: Set[asyncio.Task] = set()  # In-flight size-triggered flushes
 
     @classmethod
     async def connect_to_database(cls, max_retries: int = 3):
@@ -37,13 +51,19 @@ class MongoDB:
                     settings.MONGODB_URL,
                     serverSelectionTimeoutMS=5000,  # Timeout for server selection
                     connectTimeoutMS=5000,          # Timeout for connection
-                    socketTimeoutMS=5000            # Timeout for operations
+                    socketTimeoutMS=5000,           # Timeout for operations
+                    event_listeners=[_HeartbeatListener()],  # Keeps the health flag current
+                    tz_aware=True,                  # Return UTC-aware datetimes, matching what we write
+                    tzinfo=timezone.utc
                 )
                 cls.db = cls.client[settings.MONGODB_DB]
                 
                 # Test connection and create indexes
                 await cls.client.admin.command('ping')
+                cls._healthy = True
                 await cls.create_indexes()
+                if not cls._write_task:
+                    cls._write_task = asyncio.create_task(cls._process_writes())
                 logger.info("Connected to MongoDB")
                 return
             except Exception as e:
@@ -52,9 +72,99 @@ class MongoDB:
                     raise
                 await asyncio.sleep(1)  # Wait before retry
 
+    @classmethod
+    async def write_notification(cls, operation: Any) -> None:
+        """
+        Queue a notification write for the next bulk flush and wait for it.
+        
+        Concurrent writes are coalesced into a single unordered bulk_write,
+        so a flush costs one round-trip instead of one per document.
+        
+        Args:
+            operation: pymongo write operation (e.g. InsertOne, UpdateOne)
+            
+        Raises:
+            Exception: If the write fails
+        """
+        future = asyncio.get_running_loop().create_future()
+        async with cls._write_lock:
+            cls._write_batch.append((operation, future))
+            should_flush = len(cls._write_batch) >= settings.MONGODB_BATCH_SIZE
+        cls._write_event.set()
+        # Flush outside the lock if size threshold reached
+        if should_flush:
+            task = asyncio.create_task(cls._flush_writes())
+            cls._flush_tasks.add(task)
+            task.add_done_callback(cls._flush_tasks.discard)
+        await future
+
+    @classmethod
+    async def _process_writes(cls):
+        """
+        Flush pending writes as they arrive.
+        
+        This method runs in the background, sleeps until a write is queued,
+        then waits a short window for concurrent writers to join the batch so
+        writes are committed even if the batch size threshold is not reached.
+        """
+        while True:
+            await cls._write_event.wait()
+            await asyncio.sleep(settings.MONGODB_BATCH_TIMEOUT)
+            cls._write_event.clear()
+            while cls._write_batch:
+                await cls._flush_writes()
+
+    @classmethod
+    async def _flush_writes(cls):
+        """
+        Commit buffered writes with one bulk_write and resolve their waiters.
+        
+        The batch is unordered, so a failing document does not block the
+        rest; only the waiters of failed operations receive an exception.
+        """
+        # Take at most one batch under the lock and release it before any network I/O
+        async with cls._write_lock:
+            if not cls._write_batch:
+                return
+            batch = cls._write_batch[:settings.MONGODB_MAX_BATCH_SIZE]
+            del cls._write_batch[:settings.MONGODB_MAX_BATCH_SIZE]
+        errors = {}
+        try:
+            await cls.db.notifications.bulk_write(
+                [operation for operation, _ in batch],
+                ordered=False
+            )
+        except BulkWriteError as e:
+            errors = {
+                error["index"]: OperationFailure(error.get("errmsg"), error.get("code"), error)
+                for error in e.details.get("writeErrors", [])
+            }
+            logger.error(f"Failed to write {len(errors)}/{len(batch)} notifications: {e}")
+        except Exception as e:
+            logger.error(f"Failed to write batch of {len(batch)} notifications: {e}")
+            errors = {index: e for index in range(len(batch))}
+        for index, (_, future) in enumerate(batch):
+            if future.done():
+                continue  # Waiter went away, e.g. cancelled request
+            if index in errors:
+                future.set_exception(errors[index])
+            else:
+                future.set_result(None)
+
     @classmethod
     async def close_database_connection(cls):
         """Close database connection and cleanup resources."""
+        if cls._write_task:
+            cls._write_task.cancel()
+            try:
+                await cls._write_task
+            except asyncio.CancelledError:
+                pass
+            cls._write_task = None
+        # Commit anything still buffered before the client goes away
+        while cls._write_batch:
+            await cls._flush_writes()
+        cls._healthy = False
         if cls.client:
             cls.client.close()
             logger.info("Closed MongoDB connection")
@@ -69,11 +179,14 @@ class MongoDB:
         """
         try:
             if not cls.client:
+                cls._healthy = False
                 return False
             await cls.client.admin.command('ping')
+            cls._healthy = True
             return True
         except Exception as e:
             logger.error(f"Database connection check failed: {e}")
+            cls._healthy = False
             return False
 
     @classmethod
@@ -82,8 +195,9 @@ class MongoDB:
         Create necessary indexes for better performance.
         
         Creates indexes for:
-        - User notifications (user_id + created_at)
-        - Notification status
+        - Notification id (unique)
+        - User notifications (user_id + created_at + id)
+        - User notifications by status (user_id + status + created_at + id)
         - Notification priority
         - Notification category
         - Notification type
@@ -95,12 +209,39 @@ class MongoDB:
         """
         try:
             # Notification indexes for efficient querying
+            try:
+                await cls.db.notifications.create_index(
+                    [("id", 1)],
+                    unique=True,  # Lookups and status updates by notification id
+                    background=True
+                )
+            except Exception as e:
+                logger.warning(f"Could not create unique notification id index: {e}")
+            # Drop indexes superseded below, including auto-named versions of
+            # the same keys; a standalone status index is too low-cardinality
+            # to help reads
+            for index_name in (
+                "user_id_1_created_at_-1",
+                "user_id_1_created_at_-1__id_-1",
+                "user_id_1_created_at_-1_id_-1",
+                "user_id_1_status_1_created_at_-1",
+                "user_id_1_status_1_created_at_-1__id_-1",
+                "user_id_1_status_1_created_at_-1_id_-1",
+                "status_1"
+            ):
+                try:
+                    await cls.db.notifications.drop_index(index_name)
+                except OperationFailure:
+                    pass  # Index does not exist
+            # id is the tiebreaker that keeps cursor pagination stable
             await cls.db.notifications.create_index(
-                [("user_id", 1), ("created_at", -1)],  # Compound index for user notifications
+                [("user_id", 1), ("created_at", -1), ("id", -1)],  # Compound index for user notifications
+                name=USER_CREATED_INDEX,
                 background=True  # Create index in background
             )
             await cls.db.notifications.create_index(
-                [("status", 1)],  # Index for status filtering
+                [("user_id", 1), ("status", 1), ("created_at", -1), ("id", -1)],  # User notifications filtered by status
+                name=USER_STATUS_CREATED_INDEX,
                 background=True
             )
             await cls.db.notifications.create_index(
@@ -135,6 +276,19 @@ class MongoDB:
             logger.error(f"Error creating indexes: {e}")
             raise
 
+class _HeartbeatListener(monitoring.ServerHeartbeatListener):
+    """Update MongoDB._healthy from the heartbeats the driver already sends."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MongoDB._healthy = True
+
+    def failed(self, event):
+        logger.warning(f"MongoDB heartbeat to {event.connection_id} failed: {event.reply}")
+        MongoDB._healthy = False
+
 def get_database():
     """
     Get database instance with proper error handling.
@@ -145,9 +299,9 @@ def get_database():
     Raises:
         RuntimeError: If database is not initialized or connection is dead
     """
-    if not MongoDB.db:
+    if MongoDB.db is None:
         raise RuntimeError("Database not initialized. Call connect_to_database first.")
-    if not MongoDB.check_connection():
+    if not MongoDB._healthy:
         raise RuntimeError("Database connection is not alive")
     return MongoDB.db
 
@@ -1,11 +1,16 @@
-from aio_pika import connect_robust, Connection, Channel, Queue, Message
+from aio_pika import connect_robust, Connection, Channel, Queue, Message, IncomingMessage
 from aio_pika.pool import Pool
 from loguru import logger
 from app.core.config import settings
-from typing import Optional, List
-import json
+from typing import Any, Awaitable, Callable, Optional, List, Set
+import orjson
 import asyncio
-from datetime import datetime
+import time
+
+# Settings read on every publish, bound once at import
+_QUEUE_NAME = settings.RABBITMQ_QUEUE_NAME
+_BATCH_SIZE = settings.RABBITMQ_BATCH_SIZE
+_DELAYED_EXCHANGE = settings.RABBITMQ_DELAYED_EXCHANGE
 
 class RabbitMQ:
     """
@@ -23,10 +28,19 @@ class RabbitMQ:
     connection: Optional[Connection] = None
     channel_pool: Optional[Pool] = None
     queue: Optional[Queue] = None
+    _publish_channel: Optional[Channel] = None  # Long-lived channel used only for publishing
+    _publish_lock = asyncio.Lock()  # Serializes batch publishes on the publish channel
     _message_batch: List[Message] = []  # Buffer for batched messages
     _batch_lock = asyncio.Lock()  # Lock for thread-safe batch operations
     _batch_task: Optional[asyncio.Task] = None  # Task for processing batches
-    _connection_task: Optional[asyncio.Task] = None  # Task for monitoring connection
+    _flush_tasks: Set[asyncio.Task] = set()  # In-flight size-triggered flushes
+    _reconnect_task: Optional[asyncio.Task] = None  # Task for a full reconnect after a permanent close
+    _closing: bool = False  # Set during shutdown so close callbacks do not reconnect
+    _consumer_channel: Optional[Channel] = None  # Channel held by the notification consumer
+    _consumer_queue: Optional[Queue] = None  # Queue object the consumer is registered on
+    _consumer_tag: Optional[str] = None  # Tag of the active consumer, used to cancel it
+    _consumer_semaphore: Optional[asyncio.Semaphore] = None  # Bounds concurrently processed deliveries
+    _consumer_callback: Optional[Callable[[dict], Awaitable[Any]]] = None  # Kept to restart the consumer after a full reconnect
 
     @classmethod
     async def connect(cls, max_retries: int = 5, initial_delay: float = 1.0):
@@ -48,21 +62,41 @@ class RabbitMQ:
                     timeout=30,
                     reconnect_interval=5
                 )
+                cls.connection.close_callbacks.add(cls._on_connection_close)
+                cls.connection.reconnect_callbacks.add(cls._on_reconnect)
                 
-                # Create channel pool for efficient message handling
+                # Create channel pool for consumer and admin operations
                 cls.channel_pool = Pool(cls.get_channel, max_size=10)
                 
-                # Set up queue and channel settings
+                # Open the publish channel once instead of per batch
+                cls._publish_channel = await cls.connection.channel()
+                
+                # Set up queue
                 async with cls.channel_pool.acquire() as channel:
                     cls.queue = await channel.declare_queue(
                         settings.RABBITMQ_QUEUE_NAME,
                         durable=True  # Queue survives broker restart
                     )
-                    await channel.set_qos(prefetch_count=settings.RABBITMQ_PREFETCH_COUNT)
+                    if _DELAYED_EXCHANGE:
+                        # Broker holds messages carrying an x-delay header until it expires
+                        exchange = await channel.declare_exchange(
+                            _DELAYED_EXCHANGE,
+                            type="x-delayed-message",
+                            durable=True,
+                            arguments={"x-delayed-type": "direct"}
+                        )
+                        await cls.queue.bind(exchange, routing_key=_QUEUE_NAME)
                 
                 # Start background tasks
-                cls._batch_task = asyncio.create_task(cls._process_batch())
-                cls._connection_task = asyncio.create_task(cls._monitor_connection())
+                if not cls._batch_task:
+                    cls._batch_task = asyncio.create_task(cls._process_batch())
+                # A full reconnect leaves the consumer on the old, dead
+                # connection; drop its stale state and consume again
+                if cls._consumer_callback:
+                    cls._consumer_channel = None
+                    cls._consumer_queue = None
+                    cls._consumer_tag = None
+                    await cls.start_consumer(cls._consumer_callback)
                 logger.info("Connected to RabbitMQ")
                 return
             except Exception as e:
@@ -77,26 +111,35 @@ class RabbitMQ:
                 delay = min(delay * 2, 30)  # Exponential backoff with max delay
 
     @classmethod
-    async def _monitor_connection(cls):
+    def _on_connection_close(cls, connection: Connection, exc: Optional[BaseException] = None):
         """
-        Monitor RabbitMQ connection and reconnect if needed.
+        Handle loss of the RabbitMQ connection.
         
-        This method runs in the background and ensures the connection stays alive.
+        The robust connection reconnects and restores its channels by itself;
+        a full reconnect is only scheduled if it was closed for good without
+        us shutting down.
         """
-        while True:
-            try:
-                if not cls.connection or cls.connection.is_closed:
-                    logger.warning("RabbitMQ connection lost, attempting to reconnect...")
-                    await cls.connect()
-                await asyncio.sleep(5)  # Check connection every 5 seconds
-            except Exception as e:
-                logger.error(f"Error in connection monitor: {e}")
-                await asyncio.sleep(5)
+        if cls._closing:
+            return
+        if not connection.is_closed:
+            logger.warning(f"RabbitMQ connection lost, waiting for automatic reconnect: {exc}")
+            return
+        logger.warning("RabbitMQ connection closed, attempting to reconnect...")
+        if not cls._reconnect_task or cls._reconnect_task.done():
+            cls._reconnect_task = asyncio.create_task(cls.connect())
+
+    @classmethod
+    def _on_reconnect(cls, connection: Connection):
+        """Log a successful automatic reconnect."""
+        logger.info("Reconnected to RabbitMQ")
 
     @classmethod
     async def get_channel(cls) -> Channel:
         """
-        Get a channel from the connection.
+        Get a channel from the connection with QoS applied.
+        
+        Every pooled channel gets the prefetch count on creation, so it is
+        in effect for whichever channel ends up consuming.
         
         Returns:
             Channel: RabbitMQ channel for message operations
@@ -106,28 +149,141 @@ class RabbitMQ:
         """
         if not cls.connection:
             raise RuntimeError("RabbitMQ not initialized")
-        return await cls.connection.channel()
+        channel = await cls.connection.channel()
+        await channel.set_qos(prefetch_count=settings.RABBITMQ_PREFETCH_COUNT)
+        return channel
 
     @classmethod
-    async def publish_message(cls, message: dict):
+    async def start_consumer(cls, callback: Callable[[dict], Awaitable[Any]]):
+        """
+        Consume notifications from the queue and hand them to a callback.
+        
+        Deliveries are pushed by the broker (basic.consume) up to the prefetch
+        count, and up to RABBITMQ_CONSUMER_CONCURRENCY of them are processed at
+        once, so slow notifications do not stall the ones behind them. A
+        delivery is acked once the callback returns. If it raises, the delivery
+        is requeued once and rejected if its redelivery fails as well.
+        
+        Args:
+            callback: Coroutine function called with the decoded message body
+            
+        Raises:
+            RuntimeError: If RabbitMQ is not initialized
+        """
+        if cls._consumer_tag:
+            return
+        cls._consumer_callback = callback
+        cls._consumer_semaphore = asyncio.Semaphore(settings.RABBITMQ_CONSUMER_CONCURRENCY)
+        
+        async def on_message(message: IncomingMessage):
+            async with cls._consumer_semaphore:
+                try:
+                    payload = orjson.loads(message.body)
+                except orjson.JSONDecodeError as e:
+                    # Redelivering a malformed body would only fail again
+                    logger.error(f"Dropping undecodable message {message.message_id}: {e}")
+                    await message.reject()
+                    return
+                # Requeue a failed delivery once; a second failure usually means
+                # a dependency is down, and requeueing again would spin on it
+                requeue = not message.redelivered
+                try:
+                    async with message.process(requeue=requeue):
+                        await callback(payload)
+                except Exception as e:
+                    outcome = "requeued" if requeue else "dropped"
+                    logger.error(f"Failed to process message {message.message_id}, {outcome}: {e}")
+        
+        # Dedicated channel: a pooled one would be held for the consumer's lifetime
+        cls._consumer_channel = await cls.get_channel()
+        # Declaring (rather than get_queue(ensure=False)) registers the queue
+        # with the robust channel, which re-consumes it after a reconnect
+        cls._consumer_queue = await cls._consumer_channel.declare_queue(_QUEUE_NAME, durable=True)
+        cls._consumer_tag = await cls._consumer_queue.consume(on_message)
+        logger.info(f"Consuming from {_QUEUE_NAME} (prefetch {settings.RABBITMQ_PREFETCH_COUNT})")
+
+    @classmethod
+    async def stop_consumer(cls):
+        """
+        Stop receiving deliveries and wait for the ones in progress.
+        
+        Unacked deliveries that were not yet started are returned to the queue
+        by the broker when the consumer channel closes.
+        """
+        cls._consumer_callback = None
+        if not cls._consumer_channel:
+            return
+        try:
+            if cls._consumer_tag and not cls._consumer_channel.is_closed:
+                await cls._consumer_queue.cancel(cls._consumer_tag)
+            # Acquiring every slot waits until in-flight callbacks have finished
+            for _ in range(settings.RABBITMQ_CONSUMER_CONCURRENCY):
+                await cls._consumer_semaphore.acquire()
+            if not cls._consumer_channel.is_closed:
+                await cls._consumer_channel.close()
+        except Exception as e:
+            logger.error(f"Error stopping RabbitMQ consumer: {e}")
+        finally:
+            cls._consumer_channel = None
+            cls._consumer_queue = None
+            cls._consumer_tag = None
+            cls._consumer_semaphore = None
+
+    @classmethod
+    async def publish_message(cls, message: dict, delay: Optional[float] = None):
         """
         Publish a message to RabbitMQ with batching.
         
         Args:
             message: Dictionary containing message data
+            delay: Seconds the broker should hold the message before delivery
         """
-        async with cls._batch_lock:
-            # Create message with metadata
-            cls._message_batch.append(
-                Message(
-                    body=json.dumps(message, default=str).encode(),
-                    content_type="application/json",
-                    timestamp=datetime.utcnow().timestamp()
-                )
+        await cls.publish_messages([message], delay=delay)
+
+    @classmethod
+    async def publish_messages(cls, messages: List[dict], delay: Optional[float] = None):
+        """
+        Publish several messages to RabbitMQ with batching.
+        
+        The messages are encoded before taking the lock and added to the
+        batch in one step.
+        
+        Args:
+            messages: Dictionaries containing message data
+            delay: Seconds the broker should hold the messages before delivery.
+                Only honoured when RABBITMQ_DELAYED_EXCHANGE is configured.
+        """
+        # Create messages with metadata
+        timestamp = time.time()
+        headers = {"x-delay": int(delay * 1000)} if delay else None
+        encoded = [
+            Message(
+                body=orjson.dumps(message, default=str, option=orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z),
+                content_type="application/json",
+                timestamp=timestamp,
+                headers=headers
             )
-            # Publish batch if size threshold reached
-            if len(cls._message_batch) >= settings.RABBITMQ_BATCH_SIZE:
-                await cls._publish_batch()
+            for message in messages
+        ]
+        async with cls._batch_lock:
+            cls._message_batch.extend(encoded)
+            should_flush = len(cls._message_batch) >= _BATCH_SIZE
+        # Publish batch outside the lock if size threshold reached
+        if should_flush:
+            task = asyncio.create_task(cls._publish_batch())
+            cls._flush_tasks.add(task)
+            task.add_done_callback(cls._flush_tasks.discard)
+
+    @classmethod
+    async def flush(cls):
+        """
+        Publish everything buffered so far and wait for in-flight flushes.
+        
+        Used on shutdown so batched messages are not dropped.
+        """
+        await cls._publish_batch()
+        if cls._flush_tasks:
+            await asyncio.gather(*cls._flush_tasks, return_exceptions=True)
 
     @classmethod
     async def _process_batch(cls):
@@ -139,38 +295,55 @@ class RabbitMQ:
         """
         while True:
             await asyncio.sleep(settings.RABBITMQ_BATCH_TIMEOUT)
-            async with cls._batch_lock:
-                if cls._message_batch:
-                    await cls._publish_batch()
+            await cls._publish_batch()
 
     @classmethod
     async def _publish_batch(cls):
         """
         Publish a batch of messages with retry logic.
         
-        This method handles the actual publishing of messages to RabbitMQ
-        with automatic retries on failure.
+        The whole batch is published on the dedicated publish channel and the
+        publishes are pipelined with asyncio.gather, so a flush costs one
+        round-trip instead of one per message. Only the messages that failed
+        are retried.
         """
-        if not cls._message_batch:
-            return
         max_retries = 3
         retry_delay = 1
-        for message in cls._message_batch:
-            for attempt in range(1, max_retries + 1):
-                try:
-                    async with cls.channel_pool.acquire() as channel:
-                        await channel.default_exchange.publish(
-                            message,
-                            routing_key=settings.RABBITMQ_QUEUE_NAME
-                        )
-                    break
-                except Exception as e:
-                    logger.error(f"Failed to publish message (attempt {attempt}): {e}")
-                    if attempt == max_retries:
-                        logger.error(f"Giving up on message after {max_retries} attempts")
+        # Swap the buffer under the lock and release it before any network I/O
+        async with cls._batch_lock:
+            if not cls._message_batch:
+                return
+            batch, cls._message_batch = cls._message_batch, []
+        for attempt in range(1, max_retries + 1):
+            try:
+                async with cls._publish_lock:
+                    if cls._publish_channel is None or cls._publish_channel.is_closed:
+                        cls._publish_channel = await cls.connection.channel()
+                    if _DELAYED_EXCHANGE:
+                        exchange = await cls._publish_channel.get_exchange(_DELAYED_EXCHANGE, ensure=False)
                     else:
-                        await asyncio.sleep(retry_delay)
-        cls._message_batch.clear()
+                        exchange = cls._publish_channel.default_exchange
+                    results = await asyncio.gather(
+                        *(
+                            exchange.publish(message, routing_key=_QUEUE_NAME)
+                            for message in batch
+                        ),
+                        return_exceptions=True
+                    )
+                failed = [
+                    message for message, result in zip(batch, results)
+                    if isinstance(result, Exception)
+                ]
+            except Exception as e:
+                logger.error(f"Failed to open publish channel (attempt {attempt}): {e}")
+                failed = batch
+            if not failed:
+                return
+            logger.error(f"Failed to publish {len(failed)}/{len(batch)} messages (attempt {attempt})")
+            batch = failed
+            if attempt < max_retries:
+                await asyncio.sleep(retry_delay)
+        logger.error(f"Giving up on {len(batch)} messages after {max_retries} attempts")
 
     @classmethod
     async def close(cls):
@@ -179,17 +352,25 @@ class RabbitMQ:
         
         This method ensures proper cleanup of resources when shutting down.
         """
+        await cls.stop_consumer()
+        
         if cls._batch_task:
             cls._batch_task.cancel()
             try:
                 await cls._batch_task
             except asyncio.CancelledError:
                 pass
+            cls._batch_task = None
         
-        if cls._connection_task:
-            cls._connection_task.cancel()
+        # Publish anything still buffered before the connection goes away
+        if cls.connection and not cls.connection.is_closed:
+            await cls.flush()
+        
+        cls._closing = True
+        if cls._reconnect_task:
+            cls._reconnect_task.cancel()
             try:
-                await cls._connection_task
+                await cls._reconnect_task
             except asyncio.CancelledError:
                 pass
         
@@ -198,18 +379,23 @@ class RabbitMQ:
             logger.info("Closed RabbitMQ connection")
 
     @classmethod
-    async def check_connection(cls) -> bool:
+    async def check_connection(cls, deep: bool = False) -> bool:
         """
         Check if RabbitMQ connection is alive.
         
+        Args:
+            deep: Also round-trip the broker by declaring a throwaway queue.
+                Intended for manual diagnostics, not for frequent probes.
+        
         Returns:
             bool: True if connection is active and working
         """
         try:
-            if not cls.connection or cls.connection.is_closed:
+            if not cls.connection or cls.connection.is_closed or cls.channel_pool is None:
                 return False
-            async with cls.channel_pool.acquire() as channel:
-                await channel.declare_queue("health_check", auto_delete=True)
+            if deep:
+                async with cls.channel_pool.acquire() as channel:
+                    await channel.declare_queue("health_check", auto_delete=True)
             return True
         except Exception as e:
             logger.error(f"RabbitMQ health check failed: {e}")
@@ -1,12 +1,13 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from app.core.config import settings
-from app.api.v1.api import api_router
 from app.core.mongodb import MongoDB
 from app.core.rabbitmq import RabbitMQ
+import asyncio
 import logging
 from app.routers import notifications
+from app.services.notification_service import get_notification_service
 
 # Configure logging
 logging.basicConfig(
@@ -21,7 +22,8 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=ORJSONResponse  # orjson-encoded responses for all routes
 )
 
 # Add CORS middleware with proper configuration
@@ -38,7 +40,7 @@ app.add_middleware(
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     logger.error(f"Global error handler caught: {str(exc)}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "message": "Internal server error",
@@ -59,6 +61,10 @@ async def startup_event():
         await RabbitMQ.connect()
         logger.info("Connected to RabbitMQ")
 
+        # Start processing queued notifications
+        if settings.RABBITMQ_CONSUMER_ENABLED:
+            await RabbitMQ.start_consumer(get_notification_service().process_notification)
+
     except Exception as e:
         logger.error(f"Error during startup: {str(e)}")
         raise
@@ -68,6 +74,9 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on shutdown."""
     try:
+        # Stop consuming first; in-flight notifications still write to MongoDB
+        await RabbitMQ.stop_consumer()
+
         # Close MongoDB connection
         await MongoDB.close_database_connection()
         logger.info("Closed MongoDB connection")
@@ -79,9 +88,6 @@ async def shutdown_event():
     except Exception as e:
         logger.error(f"Error during shutdown: {str(e)}")
 
-# Include API router
-app.include_router(api_router, prefix="/api/v1")
-
 # Include routers
 app.include_router(notifications.router)
 
@@ -100,11 +106,11 @@ async def root():
 async def health_check():
     """Health check endpoint."""
     try:
-        # Check MongoDB connection
-        db_status = await MongoDB.check_connection()
-        
-        # Check RabbitMQ connection
-        rabbitmq_status = await RabbitMQ.check_connection()
+        # Check MongoDB and RabbitMQ connections concurrently
+        db_status, rabbitmq_status = await asyncio.gather(
+            MongoDB.check_connection(),
+            RabbitMQ.check_connection()
+        )
         
         return {
             "status": "healthy" if db_status and rabbitmq_status else "unhealthy",
@@ -1,6 +1,6 @@
 from datetime import datetime
-from typing import Optional, Dict, Any, Literal
-from pydantic import BaseModel, Field, validator
+from typing import Optional, Dict, Any, List, Literal, Union
+from pydantic import BaseModel, Field, field_validator
 from enum import Enum
 import uuid
 
@@ -22,10 +22,11 @@ class NotificationBase(BaseModel):
     message: str = Field(..., min_length=1, max_length=1000, description="Notification message")
     metadata: Optional[Dict[str, Any]] = Field(default=None, description="Additional metadata")
 
-    @validator('message')
+    @field_validator('message')
+    @classmethod
     def validate_message(cls, v):
         """Validate message length and content."""
-        if len(v.strip()) == 0:
+        if not v.strip():
             raise ValueError("Message cannot be empty")
         return v
 
@@ -60,4 +61,21 @@ class Notification(NotificationBase):
                 "max_retries": 3,
                 "metadata": {"priority": "high"}
             }
-        } 
\ No newline at end of file
+        }
+
+class NotificationSummary(BaseModel):
+    """Notification headers returned by list views."""
+    id: str = Field(..., description="Unique notification identifier")
+    user_id: str = Field(..., description="User identifier")
+    type: NotificationType = Field(..., description="Notification type")
+    title: str = Field(..., description="Notification title")
+    status: NotificationStatus = Field(..., description="Notification status")
+    created_at: datetime = Field(..., description="Creation timestamp")
+
+class NotificationPage(BaseModel):
+    """A page of notifications with the token for the next page."""
+    notifications: List[Union[Notification, NotificationSummary]] = Field(
+        ...,
+        description="Notifications on this page; summaries unless the full body was requested"
+    )
+    next_after: Optional[str] = Field(default=None, description="Token to pass as `after` for the next page")
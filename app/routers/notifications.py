@@ -1,18 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from typing import List, Optional
-from app.models.notification import NotificationCreate, Notification, NotificationStatus
-from app.services.notification_service import NotificationService
+from fastapi import APIRouter, Depends, HTTPException, status as http_status, Query
+from typing import Optional
+from app.models.notification import NotificationCreate, Notification, NotificationPage, NotificationStatus
+from app.services.notification_service import NotificationService, get_notification_service
 
 router = APIRouter(prefix="/api/v1")
 
-def get_notification_service() -> NotificationService:
-    """Get notification service instance."""
-    return NotificationService()
-
 @router.post(
     "/notifications",
     response_model=Notification,
-    status_code=status.HTTP_201_CREATED,
+    status_code=http_status.HTTP_201_CREATED,
     responses={
         201: {"description": "Notification created successfully"},
         400: {"description": "Invalid input data"},
@@ -39,7 +35,7 @@ async def create_notification(
         return await notification_service.create_notification(notification)
     except Exception as e:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
@@ -54,6 +50,7 @@ async def create_notification(
 )
 async def get_notification(
     notification_id: str,
+    include_metadata: bool = Query(default=False, description="Include the metadata field"),
     notification_service: NotificationService = Depends(get_notification_service)
 ) -> Notification:
     """
@@ -61,6 +58,7 @@ async def get_notification(
     
     Args:
         notification_id: ID of the notification to retrieve
+        include_metadata: Include the metadata field
         
     Returns:
         Notification object
@@ -69,10 +67,13 @@ async def get_notification(
         HTTPException: If notification not found or retrieval fails
     """
     try:
-        notification = await notification_service.get_notification(notification_id)
+        notification = await notification_service.get_notification(
+            notification_id,
+            include_metadata=include_metadata
+        )
         if not notification:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
+                status_code=http_status.HTTP_404_NOT_FOUND,
                 detail=f"Notification {notification_id} not found"
             )
         return notification
@@ -80,13 +81,13 @@ async def get_notification(
         raise
     except Exception as e:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
 @router.get(
     "/users/{user_id}/notifications",
-    response_model=List[Notification],
+    response_model=NotificationPage,
     responses={
         200: {"description": "Notifications retrieved successfully"},
         500: {"description": "Internal server error"}
@@ -95,24 +96,28 @@ async def get_notification(
 async def get_user_notifications(
     user_id: str,
     limit: int = Query(default=10, ge=1, le=100, description="Number of notifications to return"),
-    skip: int = Query(default=0, ge=0, description="Number of notifications to skip"),
+    after: Optional[str] = Query(default=None, description="Token from the previous page's next_after"),
     status: Optional[NotificationStatus] = Query(
         default=None,
         description="Filter notifications by status"
     ),
+    include_body: bool = Query(default=False, description="Return full notifications including the message"),
+    include_metadata: bool = Query(default=False, description="Include metadata in full notifications"),
     notification_service: NotificationService = Depends(get_notification_service)
-) -> List[Notification]:
+) -> NotificationPage:
     """
     Get notifications for a specific user.
     
     Args:
         user_id: ID of the user
         limit: Maximum number of notifications to return (1-100)
-        skip: Number of notifications to skip
+        after: Pagination token returned with the previous page
         status: Optional status filter
+        include_body: Return full notifications instead of summaries
+        include_metadata: Include metadata in full notifications
         
     Returns:
-        List of notifications
+        Page of notifications with the token for the next page
         
     Raises:
         HTTPException: If retrieval fails
@@ -121,12 +126,16 @@ async def get_user_notifications(
         return await notification_service.get_user_notifications(
             user_id=user_id,
             limit=limit,
-            skip=skip,
-            status=status
+            after=after,
+            status=status,
+            include_body=include_body,
+            include_metadata=include_metadata
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
@@ -164,11 +173,11 @@ async def update_notification_status(
         raise
     except Exception as e:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
-@router.get("/health", status_code=status.HTTP_200_OK)
+@router.get("/health", status_code=http_status.HTTP_200_OK)
 async def health_check(
     notification_service: NotificationService = Depends(get_notification_service)
 ):
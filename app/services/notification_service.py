@@ -1,15 +1,66 @@
 import logging
-from datetime import datetime
-from fastapi import HTTPException, status
-from app.core.mongodb import MongoDB
+from datetime import datetime, timezone
+from fastapi import HTTPException, status as http_status
+from bson import encode as bson_encode
+from bson.raw_bson import RawBSONDocument
+from pymongo import InsertOne, ReturnDocument, UpdateOne
+from cachetools import TTLCache
+from app.core.config import settings
+from app.core.mongodb import MongoDB, USER_CREATED_INDEX, USER_STATUS_CREATED_INDEX
 from app.core.rabbitmq import RabbitMQ
-from app.models.notification import NotificationCreate, Notification, NotificationStatus
+from app.models.notification import NotificationCreate, Notification, NotificationStatus, NotificationSummary
 import asyncio
-from typing import Dict, Any, Optional, List
+import base64
+import random
+from functools import lru_cache
+from typing import Dict, Any, Optional, List, Tuple
 import uuid
 
 logger = logging.getLogger(__name__)
 
+# Fields returned by list views unless the full body is requested
+_LIST_PROJECTION = {"_id": 0, "id": 1, "user_id": 1, "type": 1, "title": 1, "status": 1, "created_at": 1}
+_FULL_PROJECTION = {"_id": 0}
+_NO_METADATA_PROJECTION = {"_id": 0, "metadata": 0}
+
+# Numeric rank of each priority, built once rather than per call
+_PRIORITY_LOOKUP = {"high": 1, "normal": 2, "low": 3}.get
+
+def _encode_cursor(doc: Dict[str, Any]) -> str:
+    """Build an opaque pagination token from the last document of a page."""
+    raw = f"{doc['created_at'].isoformat()}|{doc['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(token: str) -> Tuple[datetime, str]:
+    """
+    Parse a pagination token produced by _encode_cursor.
+    
+    Raises:
+        ValueError: If the token is malformed
+    """
+    created_at, separator, notification_id = base64.urlsafe_b64decode(token.encode()).decode().partition("|")
+    if not separator or not notification_id:
+        raise ValueError("Malformed pagination token")
+    return datetime.fromisoformat(created_at), notification_id
+
+class _PageKeyIndex(TTLCache):
+    """
+    Cache keys of each user's cached list pages, for invalidation.
+    
+    Evicting a user for space also drops that user's pages, so no cached page
+    outlives the index entry that lets a write invalidate it.
+    """
+    
+    def __init__(self, pages: TTLCache):
+        super().__init__(maxsize=pages.maxsize, ttl=pages.ttl)
+        self._pages = pages
+    
+    def popitem(self):
+        user_id, keys = super().popitem()
+        for key in keys:
+            self._pages.pop(key, None)
+        return user_id, keys
+
 class NotificationService:
     """
     Service class for handling all notification operations.
@@ -24,10 +75,81 @@ class NotificationService:
     
     def __init__(self):
         """Initialize service with database and message queue connections."""
-        self.db = MongoDB.db
         self.rabbitmq = RabbitMQ()
         self.max_retries = 3  # Maximum number of retry attempts for failed notifications
         self.retry_delay = 60  # Base delay in seconds between retries
+        self.max_retry_delay = 3600  # Upper bound in seconds for a single retry delay
+        self.simulate_delay = settings.NOTIFICATION_SIMULATE_DELAY  # Fake send latency, 0 disables it
+        # Short-lived read caches, invalidated on local writes; the TTL bounds
+        # staleness from writes made by other processes
+        self._notification_cache = TTLCache(
+            maxsize=settings.NOTIFICATION_CACHE_SIZE,
+            ttl=settings.NOTIFICATION_CACHE_TTL
+        )
+        self._list_cache = TTLCache(  # (user_id, query key) -> page
+            maxsize=settings.NOTIFICATION_CACHE_SIZE,
+            ttl=settings.NOTIFICATION_CACHE_TTL
+        )
+        self._list_keys = _PageKeyIndex(self._list_cache)  # user_id -> cached page keys
+        # [reads in flight, invalidations seen] per notification/user key while
+        # a read is running, so a read that raced a write does not cache its result
+        self._reads: Dict[Tuple[str, str], List[int]] = {}
+
+    @property
+    def db(self):
+        """Current database handle, resolved on use so the service can outlive reconnects."""
+        return MongoDB.db
+
+    def _invalidate_cache(self, notification_id: Optional[str] = None, user_id: Optional[str] = None) -> None:
+        """Drop cached reads affected by a write to a notification or a user's list."""
+        if notification_id:
+            for include_metadata in (False, True):
+                self._notification_cache.pop((notification_id, include_metadata), None)
+            self._bump_reads(("notification", notification_id))
+        if user_id:
+            for key in self._list_keys.pop(user_id, ()):
+                self._list_cache.pop(key, None)
+            self._bump_reads(("user", user_id))
+
+    def _cache_page(self, user_id: str, cache_key: Tuple, page: Dict[str, Any]) -> None:
+        """Cache a list page and index its key under the user for invalidation."""
+        self._list_cache[cache_key] = page
+        keys = self._list_keys.get(user_id) or set()
+        # Forget keys of pages that have since expired or been evicted; doing
+        # it only when the set doubles keeps the cost amortized O(1)
+        if len(keys) >= 64 and not len(keys) & (len(keys) - 1):
+            keys = {key for key in keys if key in self._list_cache}
+        keys.add(cache_key)
+        # Storing the set again keeps the index entry alive as long as the page
+        self._list_keys[user_id] = keys
+
+    def _bump_reads(self, read_key: Tuple[str, str]) -> None:
+        """Mark reads in flight for a key as stale."""
+        entry = self._reads.get(read_key)
+        if entry:
+            entry[1] += 1
+
+    def _begin_read(self, read_key: Tuple[str, str]) -> int:
+        """
+        Register a read that may populate the cache.
+        
+        Returns:
+            int: Invalidation count to compare against before caching the result
+        """
+        entry = self._reads.setdefault(read_key, [0, 0])
+        entry[0] += 1
+        return entry[1]
+
+    def _read_is_current(self, read_key: Tuple[str, str], generation: int) -> bool:
+        """Check that no write invalidated the key since the read began."""
+        return self._reads[read_key][1] == generation
+
+    def _end_read(self, read_key: Tuple[str, str]) -> None:
+        """Unregister a read, forgetting the key once no reads are left."""
+        entry = self._reads[read_key]
+        entry[0] -= 1
+        if not entry[0]:
+            del self._reads[read_key]
 
     async def health_check(self) -> Dict[str, Any]:
         """
@@ -37,16 +159,22 @@ class NotificationService:
             Dict containing health status of MongoDB and RabbitMQ connections
         """
         try:
-            # Check MongoDB connection
-            mongo_status = await self._check_mongodb()
-            # Check RabbitMQ connection
-            rabbitmq_status = await self._check_rabbitmq()
+            # Check MongoDB and RabbitMQ concurrently so probe latency is the slower of the two
+            mongo_status, rabbitmq_status = await asyncio.gather(
+                self._check_mongodb(),
+                self._check_rabbitmq(),
+                return_exceptions=True
+            )
+            if isinstance(mongo_status, Exception):
+                mongo_status = {"status": "unhealthy", "message": f"MongoDB connection failed: {str(mongo_status)}"}
+            if isinstance(rabbitmq_status, Exception):
+                rabbitmq_status = {"status": "unhealthy", "message": f"RabbitMQ connection failed: {str(rabbitmq_status)}"}
             # Service is healthy only if all dependencies are healthy
             is_healthy = mongo_status["status"] == "healthy" and rabbitmq_status["status"] == "healthy"
             
             return {
                 "status": "healthy" if is_healthy else "unhealthy",
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": datetime.now(timezone.utc).isoformat(),
                 "dependencies": {
                     "mongodb": mongo_status,
                     "rabbitmq": rabbitmq_status
@@ -56,21 +184,20 @@ class NotificationService:
             logger.error(f"Health check failed: {str(e)}")
             return {
                 "status": "unhealthy",
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": datetime.now(timezone.utc).isoformat(),
                 "error": str(e)
             }
 
     async def _check_mongodb(self) -> Dict[str, Any]:
         """
-        Check MongoDB connection and basic operations.
+        Check MongoDB connection.
         
         Returns:
             Dict containing MongoDB connection status
         """
         try:
-            # Test basic database operations
+            # A ping proves the server is reachable without reading any documents
             await self.db.command("ping")
-            await self.db.notifications.find_one({})
             return {
                 "status": "healthy",
                 "message": "MongoDB connection is working"
@@ -122,30 +249,11 @@ class NotificationService:
         """
         try:
             # Generate unique ID and timestamp
-            notification_id = str(uuid.uuid4())
-            created_at = datetime.utcnow()
-            
-            # Create notification document
-            notification_doc = {
-                "id": notification_id,
-                "user_id": notification.user_id,
-                "title": notification.title,
-                "message": notification.message,
-                "type": notification.type,
-                "status": NotificationStatus.PENDING,
-                "created_at": created_at,
-                "retry_count": 0,
-                "max_retries": self.max_retries,
-                "metadata": notification.metadata or {}
-            }
+            notification_id = uuid.uuid4().hex  # 32 chars, keeps the id index compact
+            created_at = datetime.now(timezone.utc)
             
-            # Save to database and queue for processing
-            await self.db.notifications.insert_one(notification_doc)
-            await self.rabbitmq.publish_message(notification_doc)
-            logger.info(f"Notification created and queued: {notification_id}")
-            
-            # Return created notification as Pydantic model
-            return Notification(
+            # Build the notification once; the stored and published documents derive from it
+            created = Notification(
                 id=notification_id,
                 user_id=notification.user_id,
                 title=notification.title,
@@ -157,11 +265,23 @@ class NotificationService:
                 max_retries=self.max_retries,
                 metadata=notification.metadata or {}
             )
+            # Unset timestamps and error are left out of the stored document
+            notification_doc = created.model_dump(exclude_none=True)
+            
+            # Save to database and queue for processing. The document is
+            # encoded to BSON once here; the bulk writer sends the raw bytes
+            # as-is and never adds an _id to the dict we publish.
+            await MongoDB.write_notification(InsertOne(RawBSONDocument(bson_encode(notification_doc))))
+            await self.rabbitmq.publish_message(notification_doc)
+            self._invalidate_cache(user_id=notification.user_id)
+            logger.info(f"Notification created and queued: {notification_id}")
+            
+            return created
             
         except Exception as e:
             logger.error(f"Failed to create notification: {str(e)}")
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to create notification: {str(e)}"
             )
 
@@ -178,14 +298,14 @@ class NotificationService:
         try:
             # Check if max retries exceeded
             if notification.get("retry_count", 0) >= self.max_retries:
-                await self._mark_as_failed(notification["id"])
+                await self._mark_as_failed(notification["id"], notification.get("user_id"))
                 return False
 
             # Attempt to send notification
             success = await self._send_notification(notification)
             
             if success:
-                await self._mark_as_sent(notification["id"])
+                await self._mark_as_sent(notification["id"], notification.get("user_id"))
                 return True
             
             # Schedule retry if sending failed
@@ -193,68 +313,103 @@ class NotificationService:
             return False
                 
         except Exception as e:
-            await self._mark_as_failed(notification["id"])
+            await self._mark_as_failed(notification["id"], notification.get("user_id"))
             return False
 
     async def get_user_notifications(
         self,
         user_id: str,
         limit: int = 10,
-        skip: int = 0,
-        status: NotificationStatus = None
-    ) -> List[Notification]:
+        after: Optional[str] = None,
+        status: NotificationStatus = None,
+        include_body: bool = False,
+        include_metadata: bool = False
+    ) -> Dict[str, Any]:
         """
         Get notifications for a specific user with optional filtering.
         
+        Pagination is range-based: pass the ``next_after`` token of the previous
+        page as ``after`` to continue from the last seen notification. This seeks
+        the (user_id, created_at, id) index directly instead of skipping documents.
+        
         Args:
             user_id: ID of the user
             limit: Maximum number of notifications to return
-            skip: Number of notifications to skip (for pagination)
+            after: Pagination token returned with the previous page
             status: Optional status filter
+            include_body: Return full notifications instead of summaries
+            include_metadata: Also load metadata for full notifications
             
         Returns:
-            List of Notification objects
+            Dict with the list of notifications and the next page token
             
         Raises:
-            HTTPException: If retrieval fails
+            HTTPException: If the token is invalid or retrieval fails
         """
+        cache_key = (user_id, limit, after, status, include_body, include_metadata)
+        cached_page = self._list_cache.get(cache_key)
+        if cached_page is not None:
+            return cached_page
+        
+        # Build query with optional status filter
+        query = {"user_id": user_id}
+        if status:
+            query["status"] = status
+        if after:
+            try:
+                after_created_at, after_id = _decode_cursor(after)
+            except Exception:
+                raise HTTPException(
+                    status_code=http_status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid pagination token"
+                )
+            # Continue strictly after the last seen (created_at, id) pair
+            query["$or"] = [
+                {"created_at": {"$lt": after_created_at}},
+                {"created_at": after_created_at, "id": {"$lt": after_id}}
+            ]
+        
+        read_key = ("user", user_id)
+        generation = self._begin_read(read_key)
         try:
-            # Build query with optional status filter
-            query = {"user_id": user_id}
-            if status:
-                query["status"] = status
-                
-            # Execute query with sorting and pagination
-            cursor = self.db.notifications.find(query).sort(
-                "created_at", -1
-            ).skip(skip).limit(limit)
+            # Execute query sorted newest first, with id as a tiebreaker
+            if not include_body:
+                projection = _LIST_PROJECTION
+            else:
+                projection = _FULL_PROJECTION if include_metadata else _NO_METADATA_PROJECTION
+            # Pin the index whose prefix matches the filter so the planner
+            # never falls back to an in-memory sort
+            index = USER_STATUS_CREATED_INDEX if status else USER_CREATED_INDEX
+            cursor = self.db.notifications.find(query, projection).sort(
+                [("created_at", -1), ("id", -1)]
+            ).hint(index).limit(limit).batch_size(limit)  # Whole page in one reply
             
-            # Convert MongoDB documents to Pydantic models
-            notifications = []
-            async for doc in cursor:
-                notifications.append(Notification(
-                    id=doc["id"],
-                    user_id=doc["user_id"],
-                    title=doc["title"],
-                    message=doc["message"],
-                    type=doc["type"],
-                    status=doc["status"],
-                    created_at=doc["created_at"],
-                    sent_at=doc.get("sent_at"),
-                    failed_at=doc.get("failed_at"),
-                    error=doc.get("error"),
-                    retry_count=doc.get("retry_count", 0),
-                    max_retries=doc.get("max_retries", self.max_retries),
-                    metadata=doc.get("metadata", {})
-                ))
+            # Documents come from our own writer, so build models without re-validating
+            docs = await cursor.to_list(length=limit)
+            if include_body:
+                notifications = [
+                    Notification.model_construct(**{"metadata": {}, **doc}) for doc in docs
+                ]
+            else:
+                notifications = [NotificationSummary.model_construct(**doc) for doc in docs]
             
-            return notifications
+            page = {
+                "notifications": notifications,
+                # A short page means there is nothing left to fetch
+                "next_after": _encode_cursor(docs[-1]) if len(docs) == limit else None
+            }
+            # Skip caching if a write to this user's notifications landed meanwhile
+            if self._read_is_current(read_key, generation):
+                self._cache_page(user_id, cache_key, page)
+            return page
         except Exception as e:
             logger.error(f"Error retrieving notifications: {str(e)}")
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to retrieve notifications"
             )
+        finally:
+            self._end_read(read_key)
 
     async def _send_notification(self, notification: dict) -> bool:
         """
@@ -267,8 +422,9 @@ class NotificationService:
             bool: True if notification was sent successfully
         """
         try:
-            # Simulate sending delay
-            await asyncio.sleep(1)
+            # Simulate sending delay only when configured
+            if self.simulate_delay:
+                await asyncio.sleep(self.simulate_delay)
             notification_type = notification.get("type", "in_app")
             
             # TODO: Implement actual notification sending logic
@@ -289,56 +445,78 @@ class NotificationService:
         """
         # Calculate retry count and delay
         retry_count = notification.get("retry_count", 0) + 1
-        delay = self.retry_delay * (2 ** retry_count)  # Exponential backoff
+        delay = self._retry_delay(retry_count)
         
         # Update notification status
-        await self.db.notifications.update_one(
+        await MongoDB.write_notification(UpdateOne(
             {"id": notification["id"]},
             {
                 "$set": {
                     "retry_count": retry_count,
-                    "last_retry": datetime.utcnow(),
+                    "last_retry": datetime.now(timezone.utc),
                     "status": NotificationStatus.PENDING
                 }
             }
-        )
+        ))
+        
+        self._invalidate_cache(notification["id"], notification.get("user_id"))
         
-        # Requeue for processing
-        await self.rabbitmq.publish_message(notification)
+        # Requeue for processing, carrying the new retry count
+        await self.rabbitmq.publish_message({**notification, "retry_count": retry_count}, delay=delay)
 
-    async def _mark_as_sent(self, notification_id: str) -> None:
+    def _retry_delay(self, retry_count: int) -> float:
+        """
+        Capped exponential backoff with jitter.
+        
+        The jitter spreads retries of notifications that failed together so
+        they do not hit the downstream again in lockstep.
+        
+        Args:
+            retry_count: Retry attempt number, starting at 1
+            
+        Returns:
+            float: Delay in seconds
+        """
+        delay = min(self.max_retry_delay, self.retry_delay * (1 << retry_count))
+        return delay * (0.5 + random.random())
+
+    async def _mark_as_sent(self, notification_id: str, user_id: Optional[str] = None) -> None:
         """
         Mark notification as successfully sent.
         
         Args:
             notification_id: ID of the notification
+            user_id: Owner of the notification, for cache invalidation
         """
-        await self.db.notifications.update_one(
+        await MongoDB.write_notification(UpdateOne(
             {"id": notification_id},
             {
                 "$set": {
                     "status": NotificationStatus.SENT,
-                    "sent_at": datetime.utcnow()
+                    "sent_at": datetime.now(timezone.utc)
                 }
             }
-        )
+        ))
+        self._invalidate_cache(notification_id, user_id)
 
-    async def _mark_as_failed(self, notification_id: str) -> None:
+    async def _mark_as_failed(self, notification_id: str, user_id: Optional[str] = None) -> None:
         """
         Mark notification as failed.
         
         Args:
             notification_id: ID of the notification
+            user_id: Owner of the notification, for cache invalidation
         """
-        await self.db.notifications.update_one(
+        await MongoDB.write_notification(UpdateOne(
             {"id": notification_id},
             {
                 "$set": {
                     "status": NotificationStatus.FAILED,
-                    "failed_at": datetime.utcnow()
+                    "failed_at": datetime.now(timezone.utc)
                 }
             }
-        )
+        ))
+        self._invalidate_cache(notification_id, user_id)
 
     async def update_status(
         self,
@@ -359,91 +537,83 @@ class NotificationService:
             HTTPException: If update fails
         """
         try:
-            # Update notification status
-            result = await self.db.notifications.update_one(
+            # Only stamp the timestamp that belongs to the new status
+            now = datetime.now(timezone.utc)
+            set_doc: Dict[str, Any] = {"status": status}
+            if status == NotificationStatus.SENT:
+                set_doc["sent_at"] = now
+            elif status == NotificationStatus.FAILED:
+                set_doc["failed_at"] = now
+            
+            # Update notification status and read back the result in one round-trip
+            notification_doc = await self.db.notifications.find_one_and_update(
                 {"id": notification_id},
-                {
-                    "$set": {
-                        "status": status,
-                        "sent_at": datetime.utcnow() if status == NotificationStatus.SENT else None,
-                        "failed_at": datetime.utcnow() if status == NotificationStatus.FAILED else None
-                    }
-                }
+                {"$set": set_doc},
+                projection=_FULL_PROJECTION,
+                return_document=ReturnDocument.AFTER
             )
             
-            if result.modified_count == 0:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Notification {notification_id} not found"
-                )
-            
-            # Get updated notification
-            notification = await self.get_notification(notification_id)
-            if not notification:
+            if notification_doc is None:
                 raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
+                    status_code=http_status.HTTP_404_NOT_FOUND,
                     detail=f"Notification {notification_id} not found"
                 )
             
+            notification = Notification.model_construct(**notification_doc)
+            self._invalidate_cache(notification_id, notification.user_id)
             return notification
         except HTTPException:
             raise
         except Exception as e:
             logger.error(f"Error updating notification {notification_id} status: {str(e)}")
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to update notification status: {str(e)}"
             )
 
     async def get_notification_stats(self) -> dict:
         """Get detailed notification statistics."""
+        # Bucket by status and by priority server-side in a single round-trip
+        group_stage = {"count": {"$sum": 1}, "avg_retries": {"$avg": "$retry_count"}}
         pipeline = [
             {
-                "$group": {
-                    "_id": {
-                        "status": "$status",
-                        "priority": "$priority"
-                    },
-                    "count": {"$sum": 1},
-                    "avg_retries": {"$avg": "$retry_count"}
+                "$facet": {
+                    "by_status": [{"$group": {"_id": "$status", **group_stage}}],
+                    "by_priority": [{"$group": {"_id": "$priority", **group_stage}}]
                 }
             }
         ]
         
-        stats = await self.db.notifications.aggregate(pipeline).to_list(length=None)
+        result = await self.db.notifications.aggregate(pipeline).to_list(length=1)
+        facets = result[0] if result else {}
         
         return {
-            "by_status": {
-                stat["_id"]["status"]: {
+            facet: {
+                stat["_id"]: {
                     "count": stat["count"],
                     "avg_retries": stat["avg_retries"]
                 }
-                for stat in stats
-            },
-            "by_priority": {
-                stat["_id"]["priority"]: {
-                    "count": stat["count"],
-                    "avg_retries": stat["avg_retries"]
-                }
-                for stat in stats
+                for stat in facets.get(facet, [])
             }
+            for facet in ("by_status", "by_priority")
         }
 
-    def _get_priority_value(self, priority: str) -> int:
+    @staticmethod
+    def _get_priority_value(priority: str) -> int:
         """Convert priority string to numeric value."""
-        priorities = {
-            "high": 1,
-            "normal": 2,
-            "low": 3
-        }
-        return priorities.get(priority, 2)
+        return _PRIORITY_LOOKUP(priority, 2)
 
-    async def get_notification(self, notification_id: str) -> Optional[Notification]:
+    async def get_notification(
+        self,
+        notification_id: str,
+        include_metadata: bool = False
+    ) -> Optional[Notification]:
         """
         Get a notification by ID.
         
         Args:
             notification_id: ID of the notification
+            include_metadata: Load the metadata field; empty when False
             
         Returns:
             Notification object if found, None otherwise
@@ -451,29 +621,43 @@ class NotificationService:
         Raises:
             HTTPException: If retrieval fails
         """
+        cache_key = (notification_id, include_metadata)
+        cached = self._notification_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        read_key = ("notification", notification_id)
+        generation = self._begin_read(read_key)
         try:
-            notification_doc = await self.db.notifications.find_one({"id": notification_id})
+            projection = _FULL_PROJECTION if include_metadata else _NO_METADATA_PROJECTION
+            notification_doc = await self.db.notifications.find_one({"id": notification_id}, projection)
             if not notification_doc:
                 return None
                 
-            return Notification(
-                id=notification_doc["id"],
-                user_id=notification_doc["user_id"],
-                title=notification_doc["title"],
-                message=notification_doc["message"],
-                type=notification_doc["type"],
-                status=notification_doc["status"],
-                created_at=notification_doc["created_at"],
-                sent_at=notification_doc.get("sent_at"),
-                failed_at=notification_doc.get("failed_at"),
-                error=notification_doc.get("error"),
-                retry_count=notification_doc.get("retry_count", 0),
-                max_retries=notification_doc.get("max_retries", self.max_retries),
-                metadata=notification_doc.get("metadata", {})
-            )
+            # Documents come from our own writer, so build the model without re-validating
+            notification = Notification.model_construct(**{"metadata": {}, **notification_doc})
+            # Skip caching if a write to this notification landed meanwhile
+            if self._read_is_current(read_key, generation):
+                self._notification_cache[cache_key] = notification
+            return notification
         except Exception as e:
             logger.error(f"Error retrieving notification {notification_id}: {str(e)}")
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to retrieve notification: {str(e)}"
-            ) 
\ No newline at end of file
+            )
+        finally:
+            self._end_read(read_key) 
+
+@lru_cache(maxsize=1)
+def get_notification_service() -> NotificationService:
+    """
+    Get the shared notification service instance.
+    
+    The service holds no per-request state, so one instance (and its RabbitMQ
+    publisher) is reused across requests instead of being built per dependency
+    resolution.
+    
+    Returns:
+        NotificationService: Process-wide service instance
+    """
+    return NotificationService()
@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+from datetime import timezone
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+from pymongo import InsertOne
+from pymongo.errors import BulkWriteError, OperationFailure
+from app.core.config import settings
+from app.core import mongodb
+from app.core.mongodb import MongoDB
+
+@pytest.fixture
+def mock_db(monkeypatch):
+    # MongoDB keeps its write buffer on the class; give each test its own
+    db = Mock()
+    db.notifications.bulk_write = AsyncMock()
+    monkeypatch.setattr(MongoDB, "db", db)
+    monkeypatch.setattr(MongoDB, "_write_batch", [])
+    monkeypatch.setattr(MongoDB, "_write_lock", asyncio.Lock())
+    monkeypatch.setattr(settings, "MONGODB_MAX_BATCH_SIZE", 3)
+    return db
+
+def _queue_writes(count):
+    loop = asyncio.get_running_loop()
+    futures = []
+    for index in range(count):
+        future = loop.create_future()
+        MongoDB._write_batch.append((InsertOne({"id": str(index)}), future))
+        futures.append(future)
+    return futures
+
+@pytest.mark.asyncio
+async def test_flush_writes_is_capped_at_max_batch_size(mock_db):
+    futures = _queue_writes(5)
+    
+    await MongoDB._flush_writes()
+    
+    operations = mock_db.notifications.bulk_write.await_args.args[0]
+    assert [operation._doc["id"] for operation in operations] == ["0", "1", "2"]
+    assert mock_db.notifications.bulk_write.await_args.kwargs["ordered"] is False
+    assert all(future.done() for future in futures[:3])
+    # The rest waits for the next flush
+    assert len(MongoDB._write_batch) == 2
+    assert not any(future.done() for future in futures[3:])
+
+@pytest.mark.asyncio
+async def test_flush_writes_fails_only_the_failed_operations(mock_db):
+    futures = _queue_writes(3)
+    mock_db.notifications.bulk_write.side_effect = BulkWriteError({
+        "writeErrors": [{"index": 1, "code": 11000, "errmsg": "duplicate key"}]
+    })
+    
+    await MongoDB._flush_writes()
+    
+    assert futures[0].result() is None
+    assert futures[2].result() is None
+    with pytest.raises(OperationFailure) as exc_info:
+        futures[1].result()
+    assert exc_info.value.code == 11000
+
+@pytest.mark.asyncio
+async def test_flush_writes_failure_reaches_every_waiter(mock_db):
+    futures = _queue_writes(3)
+    mock_db.notifications.bulk_write.side_effect = ConnectionError("server unavailable")
+    
+    await MongoDB._flush_writes()
+    
+    for future in futures:
+        with pytest.raises(ConnectionError):
+            future.result()
+
+@pytest.mark.asyncio
+async def test_client_returns_utc_aware_datetimes(monkeypatch):
+    client_class = Mock()
+    client_class.return_value = MagicMock()
+    client_class.return_value.admin.command = AsyncMock()
+    monkeypatch.setattr(MongoDB, "client", None)
+    monkeypatch.setattr(MongoDB, "db", None)
+    monkeypatch.setattr(MongoDB, "_write_task", Mock())  # Don't start the flusher
+    
+    with patch.object(mongodb, "AsyncIOMotorClient", client_class), \
+         patch.object(MongoDB, "create_indexes", AsyncMock()):
+        await MongoDB.connect_to_database(max_retries=1)
+    
+    # Reads must carry the same UTC offset as the timestamps the service writes
+    kwargs = client_class.call_args.kwargs
+    assert kwargs["tz_aware"] is True
+    assert kwargs["tzinfo"] is timezone.utc
@@ -1,7 +1,10 @@
 import pytest
-from datetime import datetime
-from unittest.mock import Mock, patch
-from app.services.notification_service import NotificationService
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, Mock, patch
+from pymongo import InsertOne, UpdateOne
+from app.core.config import settings
+from app.core.mongodb import MongoDB
+from app.services.notification_service import NotificationService, _encode_cursor, _decode_cursor
 from app.models.notification import NotificationCreate, NotificationStatus
 
 @pytest.fixture
@@ -18,113 +21,275 @@ def mock_notification():
         priority="high"
     )
 
+@pytest.fixture
+def mock_db():
+    db = Mock()
+    with patch.object(MongoDB, "db", db), \
+         patch.object(MongoDB, "write_notification", AsyncMock()):
+        yield db
+
+def _mock_cursor(docs):
+    cursor = Mock()
+    for method in ("sort", "hint", "limit", "batch_size"):
+        getattr(cursor, method).return_value = cursor
+    cursor.to_list = AsyncMock(return_value=docs)
+    return cursor
+
 @pytest.mark.asyncio
-async def test_create_notification(notification_service, mock_notification):
-    # Mock database and RabbitMQ
-    notification_service.db.notifications.insert_one = Mock()
-    notification_service.rabbitmq.publish_message = Mock()
+async def test_create_notification(notification_service, mock_notification, mock_db):
+    # Mock RabbitMQ
+    notification_service.rabbitmq.publish_message = AsyncMock()
     
     # Create notification
     result = await notification_service.create_notification(mock_notification)
     
-    # Verify database insert
-    notification_service.db.notifications.insert_one.assert_called_once()
+    # Verify the insert went through the bulk write buffer
+    MongoDB.write_notification.assert_awaited_once()
+    operation = MongoDB.write_notification.await_args.args[0]
+    assert isinstance(operation, InsertOne)
+    inserted = dict(operation._doc)
+    assert inserted["id"] == result.id
+    assert inserted["status"] == NotificationStatus.PENDING
     
     # Verify RabbitMQ publish
-    notification_service.rabbitmq.publish_message.assert_called_once()
+    notification_service.rabbitmq.publish_message.assert_awaited_once()
+    assert notification_service.rabbitmq.publish_message.await_args.args[0]["id"] == result.id
     
     # Verify result
-    assert result["id"] == mock_notification.id
-    assert result["status"] == NotificationStatus.PENDING
-    assert result["retry_count"] == 0
+    assert len(result.id) == 32
+    assert result.user_id == mock_notification.user_id
+    assert result.status == NotificationStatus.PENDING
+    assert result.retry_count == 0
 
 @pytest.mark.asyncio
-async def test_process_notification_success(notification_service):
+async def test_process_notification_success(notification_service, mock_db):
     # Mock notification
     notification = {
         "id": "test-123",
+        "user_id": "user-123",
         "retry_count": 0
     }
     
-    # Mock database
-    notification_service.db.notifications.update_one = Mock()
-    
-    # Mock processing
-    with patch.object(notification_service, '_process_notification', return_value=True):
+    # Mock sending
+    with patch.object(notification_service, '_send_notification', AsyncMock(return_value=True)):
         result = await notification_service.process_notification(notification)
-        
-        # Verify success
-        assert result is True
-        notification_service.db.notifications.update_one.assert_called_once()
+    
+    # Verify success
+    assert result is True
+    MongoDB.write_notification.assert_awaited_once()
+    operation = MongoDB.write_notification.await_args.args[0]
+    assert isinstance(operation, UpdateOne)
+    assert operation._filter == {"id": "test-123"}
+    assert operation._doc["$set"]["status"] == NotificationStatus.SENT
 
 @pytest.mark.asyncio
-async def test_process_notification_retry(notification_service):
+async def test_process_notification_retry(notification_service, mock_db):
     # Mock notification
     notification = {
         "id": "test-123",
+        "user_id": "user-123",
         "retry_count": 0
     }
     
-    # Mock database and RabbitMQ
-    notification_service.db.notifications.update_one = Mock()
-    notification_service.rabbitmq.publish_message = Mock()
+    # Mock RabbitMQ
+    notification_service.rabbitmq.publish_message = AsyncMock()
     
-    # Mock processing failure
-    with patch.object(notification_service, '_process_notification', return_value=False):
+    # Mock sending failure
+    with patch.object(notification_service, '_send_notification', AsyncMock(return_value=False)):
         result = await notification_service.process_notification(notification)
-        
-        # Verify retry
-        assert result is False
-        assert notification_service.db.notifications.update_one.call_count == 1
-        assert notification_service.rabbitmq.publish_message.call_count == 1
+    
+    # Verify retry
+    assert result is False
+    MongoDB.write_notification.assert_awaited_once()
+    operation = MongoDB.write_notification.await_args.args[0]
+    assert isinstance(operation, UpdateOne)
+    assert operation._doc["$set"]["retry_count"] == 1
+    assert operation._doc["$set"]["status"] == NotificationStatus.PENDING
+    
+    # Requeued with the new retry count and a backoff delay
+    notification_service.rabbitmq.publish_message.assert_awaited_once()
+    requeued = notification_service.rabbitmq.publish_message.await_args
+    assert requeued.args[0]["retry_count"] == 1
+    assert requeued.kwargs["delay"] > 0
 
 @pytest.mark.asyncio
-async def test_get_user_notifications(notification_service):
-    # Mock notifications
+async def test_get_user_notifications(notification_service, mock_db):
+    # Mock notifications, newest first
     mock_notifications = [
-        {"id": "1", "user_id": "user-123", "status": "sent"},
-        {"id": "2", "user_id": "user-123", "status": "pending"}
+        {"id": "2", "user_id": "user-123", "type": "in_app", "title": "Second",
+         "status": "pending", "created_at": datetime(2024, 3, 17, 12, 0, 1)},
+        {"id": "1", "user_id": "user-123", "type": "in_app", "title": "First",
+         "status": "sent", "created_at": datetime(2024, 3, 17, 12, 0, 0)}
     ]
     
     # Mock database cursor
-    mock_cursor = Mock()
-    mock_cursor.to_list = Mock(return_value=mock_notifications)
-    notification_service.db.notifications.find = Mock(return_value=mock_cursor)
+    mock_db.notifications.find = Mock(return_value=_mock_cursor(mock_notifications))
     
     # Get notifications
-    result = await notification_service.get_user_notifications("user-123")
+    result = await notification_service.get_user_notifications("user-123", limit=2)
     
     # Verify result
-    assert len(result) == 2
-    assert result[0]["id"] == "1"
-    assert result[1]["id"] == "2"
+    notifications = result["notifications"]
+    assert len(notifications) == 2
+    assert notifications[0].id == "2"
+    assert notifications[1].id == "1"
+    # A full page points at its last notification
+    assert _decode_cursor(result["next_after"]) == (mock_notifications[1]["created_at"], "1")
+    
+    # Fetch the next page from the returned token
+    mock_db.notifications.find = Mock(return_value=_mock_cursor([]))
+    result = await notification_service.get_user_notifications("user-123", limit=2, after=result["next_after"])
+    
+    query = mock_db.notifications.find.call_args.args[0]
+    assert query["user_id"] == "user-123"
+    assert query["$or"] == [
+        {"created_at": {"$lt": mock_notifications[1]["created_at"]}},
+        {"created_at": mock_notifications[1]["created_at"], "id": {"$lt": "1"}}
+    ]
+    assert result == {"notifications": [], "next_after": None}
+
+def test_pagination_cursor_round_trip():
+    doc = {"id": "test-123", "created_at": datetime(2024, 3, 17, 12, 0, 0, 123000)}
+    
+    created_at, notification_id = _decode_cursor(_encode_cursor(doc))
+    
+    assert created_at == doc["created_at"]
+    assert notification_id == doc["id"]
+
+def test_pagination_cursor_rejects_malformed_token():
+    with pytest.raises(ValueError):
+        _decode_cursor("bm90LWEtdG9rZW4=")
 
 @pytest.mark.asyncio
-async def test_get_notification_stats(notification_service):
+async def test_get_notification_stats(notification_service, mock_db):
     # Mock stats
     mock_stats = [
         {
-            "_id": {"status": "sent", "priority": "high"},
-            "count": 5,
-            "avg_retries": 0.5
-        },
-        {
-            "_id": {"status": "failed", "priority": "normal"},
-            "count": 2,
-            "avg_retries": 2.0
+            "by_status": [
+                {"_id": "sent", "count": 5, "avg_retries": 0.5},
+                {"_id": "failed", "count": 2, "avg_retries": 2.0}
+            ],
+            "by_priority": [
+                {"_id": "high", "count": 5, "avg_retries": 0.5},
+                {"_id": "normal", "count": 2, "avg_retries": 2.0}
+            ]
         }
     ]
     
     # Mock database aggregation
-    mock_cursor = Mock()
-    mock_cursor.to_list = Mock(return_value=mock_stats)
-    notification_service.db.notifications.aggregate = Mock(return_value=mock_cursor)
+    mock_db.notifications.aggregate.return_value.to_list = AsyncMock(return_value=mock_stats)
     
     # Get stats
     result = await notification_service.get_notification_stats()
     
+    # Both breakdowns come from a single $facet stage
+    pipeline = mock_db.notifications.aggregate.call_args.args[0]
+    assert len(pipeline) == 1
+    assert set(pipeline[0]["$facet"]) == {"by_status", "by_priority"}
+    
     # Verify result
     assert "by_status" in result
     assert "by_priority" in result
     assert result["by_status"]["sent"]["count"] == 5
-    assert result["by_status"]["failed"]["count"] == 2 
\ No newline at end of file
+    assert result["by_status"]["failed"]["count"] == 2
+    assert result["by_priority"]["normal"] == {"count": 2, "avg_retries": 2.0}
+
+def test_retry_delay_is_capped(notification_service):
+    # Large retry counts must not overflow into multi-hour delays
+    for retry_count in range(1, 64):
+        delay = notification_service._retry_delay(retry_count)
+        assert 0 < delay <= notification_service.max_retry_delay * 1.5
+
+def _notification_doc(status="pending"):
+    return {
+        "id": "test-123",
+        "user_id": "user-123",
+        "title": "Test Notification",
+        "message": "This is a test notification",
+        "type": "in_app",
+        "status": status,
+        "created_at": datetime(2024, 3, 17, 12, 0, 0)
+    }
+
+@pytest.mark.asyncio
+async def test_get_notification_cache_invalidated_on_write(notification_service, mock_db):
+    mock_db.notifications.find_one = AsyncMock(return_value=_notification_doc())
+    mock_db.notifications.find_one_and_update = AsyncMock(return_value=_notification_doc("sent"))
+    
+    await notification_service.get_notification("test-123")
+    await notification_service.get_notification("test-123")
+    assert mock_db.notifications.find_one.await_count == 1
+    
+    await notification_service.update_status("test-123", NotificationStatus.SENT)
+    await notification_service.get_notification("test-123")
+    assert mock_db.notifications.find_one.await_count == 2
+
+@pytest.mark.asyncio
+async def test_get_notification_does_not_cache_read_that_raced_a_write(notification_service, mock_db):
+    async def find_one_racing_a_write(*args, **kwargs):
+        # The notification is marked sent while the read is in flight
+        await notification_service._mark_as_sent("test-123", "user-123")
+        return _notification_doc()
+    
+    mock_db.notifications.find_one = AsyncMock(side_effect=find_one_racing_a_write)
+    result = await notification_service.get_notification("test-123")
+    assert result.status == "pending"
+    
+    mock_db.notifications.find_one = AsyncMock(return_value=_notification_doc("sent"))
+    result = await notification_service.get_notification("test-123")
+    assert result.status == "sent"
+    assert notification_service._reads == {}
+
+@pytest.mark.asyncio
+async def test_get_user_notifications_does_not_cache_read_that_raced_a_write(notification_service, mock_db):
+    async def to_list_racing_a_write(length):
+        await notification_service._mark_as_sent("test-123", "user-123")
+        return [_notification_doc()]
+    
+    mock_cursor = _mock_cursor([])
+    mock_cursor.to_list = AsyncMock(side_effect=to_list_racing_a_write)
+    mock_db.notifications.find = Mock(return_value=mock_cursor)
+    
+    await notification_service.get_user_notifications("user-123")
+    mock_cursor.to_list = AsyncMock(return_value=[_notification_doc("sent")])
+    page = await notification_service.get_user_notifications("user-123")
+    
+    assert page["notifications"][0].status == "sent"
+    assert mock_db.notifications.find.call_count == 2
+
+@pytest.fixture
+def small_cache_service():
+    with patch.object(settings, "NOTIFICATION_CACHE_SIZE", 100):
+        yield NotificationService()
+
+def test_list_cache_is_bounded_across_pages_of_one_user(small_cache_service):
+    for page_number in range(1000):
+        cache_key = ("user-123", 10, f"token-{page_number}", None, False, False)
+        small_cache_service._cache_page("user-123", cache_key, {"notifications": []})
+    
+    assert len(small_cache_service._list_cache) == 100
+    assert len(small_cache_service._list_keys["user-123"]) <= 200
+    
+    small_cache_service._invalidate_cache(user_id="user-123")
+    assert len(small_cache_service._list_cache) == 0
+
+def test_list_cache_evicting_a_user_drops_their_pages(small_cache_service):
+    cache_key = ("user-0", 10, None, None, False, False)
+    small_cache_service._cache_page("user-0", cache_key, {"notifications": []})
+    # Fill the index with users whose pages have already left the cache
+    for user_number in range(1, 101):
+        small_cache_service._list_keys[f"user-{user_number}"] = set()
+    
+    # user-0 was evicted from the index, so its page can no longer be invalidated and must be gone
+    assert "user-0" not in small_cache_service._list_keys
+    assert cache_key not in small_cache_service._list_cache
+
+@pytest.mark.asyncio
+async def test_update_status_stamps_only_the_matching_timestamp(notification_service, mock_db):
+    mock_db.notifications.find_one_and_update = AsyncMock(return_value=_notification_doc("sent"))
+    
+    await notification_service.update_status("test-123", NotificationStatus.SENT)
+    
+    update = mock_db.notifications.find_one_and_update.await_args.args[1]
+    assert set(update["$set"]) == {"status", "sent_at"}
+    assert update["$set"]["sent_at"].tzinfo == timezone.utc
@@ -0,0 +1,214 @@
+import asyncio
+import orjson
+import pytest
+from itertools import chain
+from unittest.mock import AsyncMock, Mock, patch
+from aio_pika.queue import Queue
+from aio_pika.robust_channel import RobustChannel
+from aio_pika.robust_queue import RobustQueue
+from app.core import rabbitmq
+from app.core.rabbitmq import RabbitMQ
+
+@pytest.fixture(autouse=True)
+def reset_rabbitmq(monkeypatch):
+    # RabbitMQ keeps its state on the class; restore it after every test
+    for name in (
+        "connection", "channel_pool", "queue", "_publish_channel", "_batch_task",
+        "_consumer_channel", "_consumer_queue", "_consumer_tag",
+        "_consumer_semaphore", "_consumer_callback"
+    ):
+        monkeypatch.setattr(RabbitMQ, name, getattr(RabbitMQ, name))
+
+class StubChannel:
+    """Channel that records the queue it is asked to declare."""
+    is_closed = False
+
+    def __init__(self):
+        self.queues = []
+
+    async def declare_queue(self, name, **kwargs):
+        queue = Mock()
+        queue.name = name
+
+        async def consume(callback):
+            queue.consumed_with = callback
+            return f"ctag-{len(self.queues)}"
+
+        queue.consume = consume
+        self.queues.append(queue)
+        return queue
+
+    async def close(self):
+        self.is_closed = True
+
+async def noop_callback(payload):
+    pass
+
+@pytest.mark.asyncio
+async def test_consumer_is_restored_by_robust_channel():
+    connection = Mock()
+    channel = RobustChannel(connection)
+    consumes = []
+
+    async def ready(self):
+        pass
+
+    async def declare(self, timeout=None):
+        pass
+
+    async def consume(self, callback, consumer_tag=None, **kwargs):
+        consumes.append(consumer_tag)
+        return consumer_tag or "ctag-1"
+
+    async def get_channel():
+        return channel
+
+    with patch.object(RobustChannel, "ready", ready), \
+         patch.object(RobustQueue, "declare", declare), \
+         patch.object(Queue, "consume", consume), \
+         patch.object(RabbitMQ, "get_channel", get_channel):
+        await RabbitMQ.start_consumer(noop_callback)
+
+        # The queue must be registered with the channel for restore
+        queues = tuple(chain(*channel._queues.values()))
+        assert RabbitMQ._consumer_queue in queues
+
+        # Simulate the queue restore the channel runs after a reconnect
+        for queue in queues:
+            await queue.restore()
+
+    assert consumes == [None, "ctag-1"]
+
+@pytest.mark.asyncio
+async def test_full_reconnect_restarts_consumer():
+    channels = []
+
+    async def get_channel():
+        channel = StubChannel()
+        channels.append(channel)
+        return channel
+
+    connection = Mock()
+    connection.close_callbacks = set()
+    connection.reconnect_callbacks = set()
+
+    async def open_channel():
+        return StubChannel()
+
+    connection.channel = open_channel
+
+    async def connect_robust(*args, **kwargs):
+        return connection
+
+    # Consumer state left behind by the connection that was closed for good
+    RabbitMQ._consumer_callback = noop_callback
+    RabbitMQ._consumer_tag = "stale-tag"
+    RabbitMQ._consumer_channel = StubChannel()
+    RabbitMQ._batch_task = Mock()
+
+    with patch.object(rabbitmq, "connect_robust", connect_robust), \
+         patch.object(RabbitMQ, "get_channel", get_channel):
+        await RabbitMQ.connect(max_retries=1)
+
+    consumer_queue = RabbitMQ._consumer_queue
+    assert RabbitMQ._consumer_tag != "stale-tag"
+    assert RabbitMQ._consumer_channel in channels
+    assert consumer_queue.name == rabbitmq._QUEUE_NAME
+    assert consumer_queue.consumed_with is not None
+
+class StubMessage:
+    """Delivery that records how it was settled."""
+    message_id = "message-1"
+
+    def __init__(self, redelivered):
+        self.body = orjson.dumps({"id": "test-123"})
+        self.redelivered = redelivered
+        self.requeue = None
+
+    def process(self, requeue):
+        self.requeue = requeue
+        return Mock(__aenter__=AsyncMock(), __aexit__=AsyncMock(return_value=False))
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("redelivered, requeue", [(False, True), (True, False)])
+async def test_failed_delivery_is_requeued_only_once(redelivered, requeue):
+    channel = StubChannel()
+
+    async def get_channel():
+        return channel
+
+    async def failing_callback(payload):
+        raise ConnectionError("MongoDB unavailable")
+
+    with patch.object(RabbitMQ, "get_channel", get_channel):
+        await RabbitMQ.start_consumer(failing_callback)
+
+    message = StubMessage(redelivered)
+    await channel.queues[0].consumed_with(message)
+
+    assert message.requeue is requeue
+
+class StubExchange:
+    """Exchange that records publishes and fails chosen messages."""
+
+    def __init__(self, failures):
+        self.failures = failures  # message id -> number of attempts that fail
+        self.attempts = []
+
+    async def publish(self, message, routing_key):
+        await asyncio.sleep(0)
+        message_id = orjson.loads(message.body)["id"]
+        self.attempts.append(message_id)
+        if self.failures.get(message_id, 0):
+            self.failures[message_id] -= 1
+            raise ConnectionError(f"publish of {message_id} failed")
+
+@pytest.fixture
+def stub_exchange(monkeypatch):
+    exchange = StubExchange({})
+    channel = Mock()
+    channel.is_closed = False
+    channel.default_exchange = exchange
+    monkeypatch.setattr(RabbitMQ, "_publish_channel", channel)
+    monkeypatch.setattr(RabbitMQ, "_message_batch", [])
+    monkeypatch.setattr(RabbitMQ, "_flush_tasks", set())
+    monkeypatch.setattr(RabbitMQ, "_batch_lock", asyncio.Lock())
+    monkeypatch.setattr(RabbitMQ, "_publish_lock", asyncio.Lock())
+    return exchange
+
+@pytest.mark.asyncio
+async def test_publish_batch_retries_only_failed_messages(stub_exchange):
+    stub_exchange.failures = {"1": 1, "3": 1}
+    await RabbitMQ.publish_messages([{"id": str(index)} for index in range(5)])
+
+    with patch.object(rabbitmq.asyncio, "sleep", AsyncMock()) as sleep:
+        await RabbitMQ._publish_batch()
+
+    # One pipelined pass over the batch, then a retry of just the failures
+    assert stub_exchange.attempts == ["0", "1", "2", "3", "4", "1", "3"]
+    # A single back-off between the two attempts (the stub's own sleep(0) aside)
+    assert [call.args for call in sleep.await_args_list].count((1,)) == 1
+    assert RabbitMQ._message_batch == []
+
+@pytest.mark.asyncio
+async def test_publish_batch_gives_up_after_three_attempts(stub_exchange):
+    stub_exchange.failures = {"1": 5}
+    await RabbitMQ.publish_messages([{"id": "0"}, {"id": "1"}])
+
+    with patch.object(rabbitmq.asyncio, "sleep", AsyncMock()):
+        await RabbitMQ._publish_batch()
+
+    assert stub_exchange.attempts == ["0", "1", "1", "1"]
+
+@pytest.mark.asyncio
+async def test_flush_drains_buffer_and_in_flight_flushes(stub_exchange):
+    # A full batch starts a background flush; the extra message stays buffered
+    await RabbitMQ.publish_messages([{"id": str(index)} for index in range(rabbitmq._BATCH_SIZE + 1)])
+    in_flight = set(RabbitMQ._flush_tasks)
+    assert in_flight
+
+    await RabbitMQ.flush()
+
+    assert sorted(stub_exchange.attempts, key=int) == [str(index) for index in range(rabbitmq._BATCH_SIZE + 1)]
+    assert RabbitMQ._message_batch == []
+    assert all(task.done() for task in in_flight)